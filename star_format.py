@@ -7,34 +7,35 @@ Version: 1.0
 Date: 2024-08-19
 """
 
+import csv
 import os
+import re
 import sys
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+# Matches "key | value" lines, capturing both sides without surrounding whitespace
+LINE_PATTERN = re.compile(r'^[ \t]*([^|\n]+?)[ \t]*\|[ \t]*(.*?)[ \t]*$', re.M)
+SKIP_KEYS = {"UNIQUE READS:", "MULTI-MAPPING READS:", "UNMAPPED READS:", "CHIMERIC READS:"}
 
 def parse_final_out(file_path):
     """
     Parses the .final.out file and extracts the relevant information from stat align result.
     """
     with open(file_path, 'r') as f:
-        lines = f.readlines()
+        data = f.read()
 
     # Initialize a list to store the relevant data
     parsed_data = []
     keys_order = []
 
-    # Filter out lines that are not needed and clean the remaining lines
-    for line in lines:
-        line = line.strip()  # Remove leading/trailing whitespaces
-        if line.startswith("UNIQUE READS:") or line.startswith("MULTI-MAPPING READS:") or \
-           line.startswith("UNMAPPED READS:") or line.startswith("CHIMERIC READS:"):
+    # Scan all "key | value" lines in one pass, skipping the section headers
+    for match in LINE_PATTERN.finditer(data):
+        key, value = match.groups()
+        if key in SKIP_KEYS:
             continue  # Skip the unwanted lines
-
-        if "|" in line:
-            key, value = line.split("|")
-            key = key.strip()  # Remove any leading/trailing whitespaces
-            value = value.strip()  # Remove any leading/trailing whitespaces
-            parsed_data.append((key, value))
-            keys_order.append(key)
+        parsed_data.append((key, value))
+        keys_order.append(key)
 
     return dict(parsed_data), keys_order
 
@@ -45,30 +46,42 @@ def process_directory(directory_path):
     combined_data = {}
     columns_order = None
 
-    for filename in os.listdir(directory_path):
-        if filename.endswith(".final.out"):
-            file_path = os.path.join(directory_path, filename)
-            file_data, keys_order = parse_final_out(file_path)
-            # Use the filename (without extension) as the column name
-            column_name = os.path.splitext(filename)[0]
-            combined_data[column_name] = file_data
-            # Store the keys order based on the first file processed
-            if columns_order is None:
-                columns_order = keys_order
-
-    # Convert the dictionary of data into a DataFrame
+    # os.scandir yields the full path with each entry, no extra join or stat per file
+    with os.scandir(directory_path) as it:
+        entries = sorted((entry for entry in it if entry.name.endswith(".final.out")), key=lambda entry: entry.name)
+
+    # Read the files concurrently, the GIL is released while waiting on file I/O
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        results = list(executor.map(parse_final_out, [entry.path for entry in entries]))
+
+    for entry, (file_data, keys_order) in zip(entries, results):
+        # Store the keys order based on the first file processed
+        if columns_order is None:
+            columns_order = keys_order
+        # Use the filename (without extension) as the column name, with rows in the original file's order
+        column_name = os.path.splitext(entry.name)[0]
+        combined_data[column_name] = pd.Series(file_data, index=columns_order)
+
+    # Convert the dictionary of data into a DataFrame, already in the right row order
     df = pd.DataFrame(combined_data)
     df.index.name = 'Metrics'
 
-    # Reorder the DataFrame's index to match the original file's order
-    df = df.reindex(columns_order)
-
     return df
 
+def write_csv(df, output_name):
+    """
+    Writes the combined DataFrame to a CSV file with the csv module instead of pandas' per-cell formatter.
+    """
+    with open(output_name, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow([df.index.name] + list(df.columns))
+        # Metrics missing from a file are written as empty cells, as with df.to_csv
+        writer.writerows(df.fillna('').itertuples(name=None))
+
 def main(directory_path, output_name):
     df = process_directory(directory_path)
     # Save the combined DataFrame to a CSV file
-    df.to_csv(output_name, index=True)
+    write_csv(df, output_name)
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -15,44 +15,160 @@ Usage:
         python script.py -i example.fastq -o output_prefix -s 8 16 --interactive --add_percentage -sp special_output_prefix
     - Generate plots directly from an existing CSV table:
         python script.py --table_input existing_frequencies.csv -o output_prefix --interactive
+    - Generate only the interactive HTML, skipping the static image:
+        python script.py -i example.fastq -o output_prefix --interactive --no_static
 """
 
+import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Use the Agg backend for non-GUI environments
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import plotly.graph_objs as go
-from Bio import SeqIO
 import argparse
 import gzip
+import io
 import os
 
-def parse_fastq(file_path, n_bases):
-    base_counts = {base: [0] * n_bases for base in 'ATCGN'}
-    total_counts = [0] * n_bases
+try:
+    import dnaio
+    HAS_DNAIO = True
+except ImportError:  # dnaio is optional, fall back to the built-in reader
+    HAS_DNAIO = False
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # Numba is optional, fall back to NumPy block counting
+    HAS_NUMBA = False
+
+BASES = 'ATCGN'
+BATCH_SIZE = 65536  # Number of reads counted together in one batch
+READ_BUFFER_SIZE = 1 << 16  # Buffer size used to stream FASTQ files
+COLORS = ['blue', 'orange', 'green', 'red', 'purple']  # Line colors, in the column order A, T, C, G, N
+
+# Lookup table mapping an ASCII code to its row in the counts array (-1 for other characters)
+BASE_LUT = np.full(256, -1, dtype=np.int8)
+BASE_LUT[np.frombuffer(BASES.encode('ascii'), dtype=np.uint8)] = np.arange(len(BASES))
+
+def count_block(prefixes, n_bases, counts):
+    """
+    Adds the per-position base counts of a batch of sequence prefixes to counts.
+    Each prefix is padded to n_bases so the batch can be viewed as a 2D uint8 array.
+    """
+    buffer = b''.join(prefix.ljust(n_bases, b'\x00') for prefix in prefixes)
+    block = np.frombuffer(buffer, dtype=np.uint8).reshape(len(prefixes), n_bases)
+    for row, base in enumerate(BASES):
+        counts[row] += (block == ord(base)).sum(axis=0)
 
-    # Detect if the file is gzipped
+def accumulate(seq_bytes, offsets, lut, counts):
+    """
+    Walks a flat buffer of concatenated prefixes and increments counts[row, position].
+    Read r occupies seq_bytes[offsets[r]:offsets[r + 1]].
+    """
+    for r in range(offsets.shape[0] - 1):
+        start = offsets[r]
+        for i in range(offsets[r + 1] - start):
+            row = lut[seq_bytes[start + i]]
+            if row >= 0:
+                counts[row, i] += 1
+
+if HAS_NUMBA:
+    accumulate = njit(cache=True, boundscheck=False)(accumulate)
+
+def count_batch(prefixes, n_bases, counts):
+    """
+    Adds a batch of sequence prefixes to counts, using the Numba kernel when available.
+    """
+    if not HAS_NUMBA:
+        count_block(prefixes, n_bases, counts)
+        return
+    offsets = np.zeros(len(prefixes) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, prefixes), dtype=np.int64, count=len(prefixes)), out=offsets[1:])
+    seq_bytes = np.frombuffer(b''.join(prefixes), dtype=np.uint8)
+    accumulate(seq_bytes, offsets, BASE_LUT, counts)
+
+class FastqFormatError(ValueError):
+    """
+    Raised by iter_prefixes for a malformed FASTQ file, whichever reader is used.
+    line_number is 1-based, or None if unknown.
+    """
+    def __init__(self, message, line_number):
+        super(FastqFormatError, self).__init__('Error in FASTQ file at {}: {}'.format(
+            'unknown line' if line_number is None else 'line {}'.format(line_number), message))
+        self.line_number = line_number
+
+def iter_prefixes(file_path, n_bases):
+    """
+    Yields the first n_bases of every read in a FASTQ file (plain or gzipped) as ASCII bytes.
+    Sequences are sliced as soon as they are read, so the rest of the read is never copied.
+    Records must be four lines each with no blank lines in between or at the end,
+    otherwise FastqFormatError is raised.
+    """
+    if HAS_DNAIO:
+        # dnaio detects the compression itself and parses in C
+        try:
+            with dnaio.open(file_path) as reader:
+                for record in reader:
+                    yield record.sequence[:n_bases].encode('ascii')
+        except dnaio.FastqFormatError as e:
+            raise FastqFormatError(e.message, None if e.line is None else e.line + 1) from e
+        return
+
+    # Detect if the file is gzipped, read in binary through a 64 KiB buffer to skip text decoding
     if file_path.endswith('.gz'):
-        handle = gzip.open(file_path, 'rt')  # Open as text
+        handle = io.BufferedReader(gzip.GzipFile(file_path, 'rb'), buffer_size=READ_BUFFER_SIZE)
     else:
-        handle = open(file_path, 'r')
+        handle = open(file_path, 'rb', buffering=READ_BUFFER_SIZE)
 
     with handle:
-        for record in SeqIO.parse(handle, 'fastq'):
-            sequence = str(record.seq)
-            for i in range(min(n_bases, len(sequence))):
-                base = sequence[i]
-                if base in base_counts:
-                    base_counts[base][i] += 1
-                    total_counts[i] += 1
-
-    # Calculate frequencies with explicit float conversion
-    base_freqs = {
-        base: [count / float(total) if total > 0 else 0 for count, total in zip(counts, total_counts)]
-        for base, counts in base_counts.items()
-    }
-
-    return pd.DataFrame(base_freqs)
+        # Each record is four lines: @title, sequence, +, quality
+        line_number = 0  # Lines read before the current record
+        for title in handle:
+            sequence = handle.readline()
+            plus = handle.readline()
+            quality = handle.readline()
+            if not quality:
+                record = title + sequence + plus
+                raise FastqFormatError('Premature end of file encountered. The incomplete final record was: {!r}'.format(
+                    record.decode('ascii', 'replace')), line_number + record.count(b'\n') + 1)
+            if not title.startswith(b'@'):
+                raise FastqFormatError("Line expected to start with '@', but found {!r}".format(
+                    title[:1].decode('ascii', 'replace')), line_number + 1)
+            if not plus.startswith(b'+'):
+                raise FastqFormatError("Line expected to start with '+', but found {!r}".format(
+                    plus[:1].decode('ascii', 'replace')), line_number + 3)
+            sequence = sequence.rstrip(b'\r\n')
+            if len(quality.rstrip(b'\r\n')) != len(sequence):
+                raise FastqFormatError('Length of sequence and qualities differ', line_number + 4)
+            line_number += 4
+            yield sequence[:n_bases]
+
+def parse_fastq(file_path, n_bases):
+    """
+    Calculates the frequency of each base at the first n_bases positions of a FASTQ file.
+    Counts are kept in one contiguous (bases x positions) int64 array, one row per base in BASES.
+    """
+    counts = np.zeros((len(BASES), n_bases), dtype=np.int64)
+
+    prefixes = []
+    for prefix in iter_prefixes(file_path, n_bases):
+        prefixes.append(prefix)
+        if len(prefixes) == BATCH_SIZE:
+            count_batch(prefixes, n_bases, counts)
+            prefixes = []
+    if prefixes:
+        count_batch(prefixes, n_bases, counts)
+
+    # Calculate frequencies, leaving positions without any counted base at 0
+    totals = counts.sum(axis=0)
+    freqs = np.zeros(counts.shape, dtype=np.float64)
+    np.divide(counts, totals, out=freqs, where=totals > 0)
+
+    # freqs.T is already column-major, so pandas can wrap it as a single block without copying
+    return pd.DataFrame(np.asfortranarray(freqs.T), columns=list(BASES), copy=False)
 
 def extract_specific_positions(df, positions):
     """
@@ -66,65 +182,72 @@ def extract_specific_positions(df, positions):
         positions_data = df.iloc[positions]
     return positions_data
 
-def add_percentage_labels(ax, df, colors):
+def add_percentage_labels(ax, x, values, bases, colors):
     """
     Adds percentage labels below each base position and in the same color as the line.
     """
-    for i in range(len(df)):
-        if (i + 1) % 5 == 0:  # Optional: Only add labels for positions that are multiples of 5
-            labels = []
-            for base, color in zip(df.columns, colors):
-                percentage = df.iloc[i][base] * 100
-                if i == 0:
-                    label = '{}{:0.0f}%'.format(base, percentage)
-                else:
-                    label = '{:0.0f}%'.format(percentage)
-                ax.text(i + 1, -0.1 - 0.05 * df.columns.get_loc(base), label, ha='center', va='top', 
-                        fontsize=8, color=color, transform=ax.get_xaxis_transform())
+    transform = ax.get_xaxis_transform()
+    for i in range(4, len(x), 5):  # Optional: Only add labels for positions that are multiples of 5
+        for j, color in enumerate(colors[:len(bases)]):
+            label = '{:0.0f}%'.format(values[i, j] * 100)
+            ax.text(x[i], -0.1 - 0.05 * j, label, ha='center', va='top',
+                    fontsize=8, color=color, transform=transform)
+
+def plot_base_lines(ax, x, values, bases, colors):
+    """
+    Draws the line of every base as a single LineCollection and returns legend handles for them.
+    """
+    segments = [np.column_stack([x, values[:, j]]) for j in range(len(bases))]
+    ax.add_collection(LineCollection(segments, colors=colors[:len(segments)]))
+    ax.autoscale_view()
+    return [Line2D([], [], color=color, label=base) for base, color in zip(bases, colors)]
 
-def plot_base_frequencies_static(df, output_plot, file_name, n_bases, add_percentage):
+def plot_base_frequencies_static(x, values, bases, output_plot, file_name, n_bases, add_percentage, fig=None):
     """
     Plots the base frequencies as a static image.
+    x holds the 1-based positions and values the (positions x bases) frequency array.
+    An existing figure can be passed as fig to be cleared and reused when plotting many samples.
     """
-    plt.figure(figsize=(12, 8))
-    ax = plt.gca()
-    colors = ['blue', 'orange', 'green', 'red', 'purple']  # Specify the colors for A, T, G, C, N
-    for base, color in zip(df.columns, colors):
-        ax.plot(df.index + 1, df[base], label=base, color=color)
-    
+    if fig is None:
+        owns_figure = True
+        fig, ax = plt.subplots(figsize=(12, 8))
+    else:
+        owns_figure = False
+        ax = fig.gca()
+        ax.cla()
+    handles = plot_base_lines(ax, x, values, bases, COLORS)
+
     if add_percentage:
-        add_percentage_labels(ax, df, colors)
-    
-    plt.title('Base Frequencies in {} (First {} Bases)'.format(file_name, n_bases))
-    plt.xlabel('Base Position')
-    plt.ylabel('Frequency')
-    plt.legend(loc='upper right')
-    plt.grid(True)
+        add_percentage_labels(ax, x, values, bases, COLORS)
+
+    ax.set_title('Base Frequencies in {} (First {} Bases)'.format(file_name, n_bases))
+    ax.set_xlabel('Base Position')
+    ax.set_ylabel('Frequency')
+    ax.legend(handles=handles, loc='upper right')
+    ax.grid(True)
 
     # Set x-axis to show integer values only
-    plt.xticks(range(1, len(df) + 1, 5))
+    ax.set_xticks(range(1, len(x) + 1, 5))
 
     # Adjust the bottom margin to fit the labels if percentage labels are added
-    if add_percentage:
-        plt.subplots_adjust(bottom=0.3)
+    fig.subplots_adjust(bottom=0.3 if add_percentage else matplotlib.rcParams['figure.subplot.bottom'])
 
-    plt.savefig(output_plot)
-    plt.close()
+    fig.savefig(output_plot)
+    if owns_figure:
+        plt.close(fig)
 
-def plot_specific_positions_frequencies(df, output_plot, file_name, start_pos, end_pos):
+def plot_specific_positions_frequencies(x, values, bases, output_plot, file_name, start_pos, end_pos):
     """
     Plots the base frequencies for specific positions as a static image.
     """
     plt.figure(figsize=(12, 8))
     ax = plt.gca()
-    colors = ['blue', 'orange', 'green', 'red', 'purple']  # Specify the colors for A, T, G, C, N
-    for base, color in zip(df.columns, colors):
-        ax.plot(df.index + 1, df[base], label=base, color=color)
-    
+    handles = plot_base_lines(ax, x, values, bases, COLORS)
+
     plt.title('Base Frequencies at Specific Positions from {} to {} in {}'.format(start_pos, end_pos, file_name))
     plt.xlabel('Base Position')
     plt.ylabel('Frequency')
-    plt.legend(loc='upper right')
+    plt.legend(handles=handles, loc='upper right')
     plt.grid(True)
 
     plt.xticks(range(start_pos, end_pos + 1, 1))
@@ -132,21 +255,24 @@ def plot_specific_positions_frequencies(df, output_plot, file_name, start_pos, e
     plt.savefig(output_plot)
     plt.close()
 
-def plot_base_frequencies_interactive(df, output_plot, file_name, n_bases):
+def plot_base_frequencies_interactive(x, values, bases, output_plot, file_name, n_bases):
     """
     Plots the base frequencies as an interactive Plotly graph.
     """
     fig = go.Figure()
-    colors = ['blue', 'orange', 'green', 'red', 'purple']  # Specify the colors for A, T, G, C, N
-    
-    for base, color in zip(df.columns, colors):
+
+    # Build the "Position {}: {}: {:.2%}" hover texts with vectorized string operations
+    positions = np.char.add('Position ', np.asarray(x).astype(str))
+    percentages = np.char.mod('%.2f%%', values * 100)
+
+    for j, (base, color) in enumerate(zip(bases, COLORS)):
         fig.add_trace(go.Scatter(
-            x=df.index + 1,
-            y=df[base],
+            x=x,
+            y=values[:, j],
             mode='lines+markers',
             name=base,
             line=dict(color=color),
-            text=['Position {}: {}: {:.2%}'.format(i + 1, base, v) for i, v in enumerate(df[base])],  # Add position and percentage as hover text
+            text=np.char.add(np.char.add(positions, ': {}: '.format(base)), percentages[:, j]),  # Add position and percentage as hover text
             hoverinfo='text'
         ))
 
@@ -160,7 +286,7 @@ def plot_base_frequencies_interactive(df, output_plot, file_name, n_bases):
     
     fig.write_html(output_plot)
 
-def main(input_file, table_input, output_prefix, n_bases, specific_positions, interactive, add_percentage, specific_output_prefix):
+def main(input_file, table_input, output_prefix, n_bases, specific_positions, interactive, add_percentage, specific_output_prefix, no_static=False):
     # Determine file name and output paths
     file_name = os.path.basename(input_file.split(".")[0]) if input_file else os.path.basename(table_input.split(".")[0])
     output_table = "{}.csv".format(output_prefix)
@@ -176,20 +302,27 @@ def main(input_file, table_input, output_prefix, n_bases, specific_positions, in
         base_frequencies = parse_fastq(input_file, n_bases)
         base_frequencies.to_csv(output_table, index_label='Base Position')
 
+    # Read the positions and frequencies once, the plots work on plain arrays
+    x = np.arange(1, len(base_frequencies) + 1)
+    values = base_frequencies.to_numpy()
+    bases = list(base_frequencies.columns)
+
     # Plot specific positions if requested
     if specific_positions:
         specific_positions = [pos - 1 for pos in specific_positions]  # Convert to zero-based indexing
         positions_data = extract_specific_positions(base_frequencies, specific_positions)
         start_pos, end_pos = specific_positions[0] + 1, specific_positions[-1] + 1  # Convert to 1-based indexing for display
         specific_output_plot = "{}.png".format(specific_output_prefix)
-        plot_specific_positions_frequencies(positions_data, specific_output_plot, file_name, start_pos, end_pos)
+        plot_specific_positions_frequencies(positions_data.index.to_numpy() + 1, positions_data.to_numpy(), bases,
+                                            specific_output_plot, file_name, start_pos, end_pos)
 
-    # Generate static plot
-    plot_base_frequencies_static(base_frequencies, output_plot, file_name, n_bases, add_percentage)
+    # Generate static plot unless it is not wanted
+    if not no_static:
+        plot_base_frequencies_static(x, values, bases, output_plot, file_name, n_bases, add_percentage)
 
     # Generate interactive plot if requested
     if interactive:
-        plot_base_frequencies_interactive(base_frequencies, output_html, file_name, n_bases)
+        plot_base_frequencies_interactive(x, values, bases, output_html, file_name, n_bases)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Calculate and plot base frequencies in a FASTQ file or from an existing CSV table.')
@@ -201,8 +334,9 @@ if __name__ == "__main__":
     parser.add_argument('-sp', '--specific_output_prefix', type=str, help='Output file name prefix for specific positions plot.')
     parser.add_argument('--interactive', action='store_true', help='Generate an interactive HTML plot.')
     parser.add_argument('--add_percentage', action='store_true', help='Add percentage labels to the static image.')
+    parser.add_argument('--no_static', action='store_true', help='Do not generate the static image (e.g. when only the interactive HTML is needed).')
 
 
     args = parser.parse_args()
     
-    main(args.input_file, args.table_input, args.output_prefix, args.num_bases, args.specific_positions, args.interactive, args.add_percentage, args.specific_output_prefix)
+    main(args.input_file, args.table_input, args.output_prefix, args.num_bases, args.specific_positions, args.interactive, args.add_percentage, args.specific_output_prefix, args.no_static)